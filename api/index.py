@@ -1,16 +1,10 @@
 """
 Vercel Serverless Function Entry Point
 """
-import sys
 import os
+import sys
 
-# 프로젝트 루트를 Python 경로에 추가
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
-
-# Flask 앱 임포트
-from app import app
-
-# Vercel의 WSGI 핸들러 - Flask 앱을 직접 export
-handler = app
+# 프로젝트 루트를 Python 경로에 추가 후 Flask 앱을 WSGI 핸들러로 export
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app import app as handler
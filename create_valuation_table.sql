@@ -19,6 +19,7 @@ CREATE TABLE IF NOT EXISTS stock_valuation_data (
 -- 인덱스 생성 (검색 성능 향상)
 CREATE INDEX IF NOT EXISTS idx_stock_valuation_code_year ON stock_valuation_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_valuation_cache ON stock_valuation_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_valuation_code_cache ON stock_valuation_data(stock_code, cache_year, cache_month);
 
 -- 테이블 확인
 SELECT 'stock_valuation_data 테이블이 성공적으로 생성되었습니다.' AS message;
@@ -6,10 +6,14 @@
 """
 
 import os
-import psycopg2
-from psycopg2 import sql
 from dotenv import load_dotenv
 
+# psycopg2는 테이블 직접 생성에만 필요 (없어도 스키마/테이블 상수는 임포트 가능)
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -40,7 +44,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_price_code_year ON stock_price_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_price_cache ON stock_price_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_price_cache ON stock_price_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_price_code_cache ON stock_price_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -62,7 +67,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_revenue_code_year ON stock_revenue_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_revenue_cache ON stock_revenue_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_revenue_cache ON stock_revenue_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_revenue_code_cache ON stock_revenue_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -84,7 +90,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_operating_income_code_year ON stock_operating_income_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_operating_income_cache ON stock_operating_income_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_operating_income_cache ON stock_operating_income_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_operating_income_code_cache ON stock_operating_income_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -106,7 +113,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_net_profit_code_year ON stock_net_profit_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_net_profit_cache ON stock_net_profit_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_net_profit_cache ON stock_net_profit_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_net_profit_code_cache ON stock_net_profit_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -128,7 +136,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_total_debt_code_year ON stock_total_debt_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_total_debt_cache ON stock_total_debt_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_total_debt_cache ON stock_total_debt_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_total_debt_code_cache ON stock_total_debt_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -150,7 +159,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_code_year ON stock_current_liabilities_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_cache ON stock_current_liabilities_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_cache ON stock_current_liabilities_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_code_cache ON stock_current_liabilities_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -172,7 +182,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_code_year ON stock_interest_expense_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_cache ON stock_interest_expense_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_cache ON stock_interest_expense_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_code_cache ON stock_interest_expense_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -194,7 +205,8 @@ TABLE_SCHEMAS = {
         """,
         'indexes': [
             "CREATE INDEX IF NOT EXISTS idx_stock_cash_code_year ON stock_cash_data(stock_code, year);",
-            "CREATE INDEX IF NOT EXISTS idx_stock_cash_cache ON stock_cash_data(cache_year, cache_month);"
+            "CREATE INDEX IF NOT EXISTS idx_stock_cash_cache ON stock_cash_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_cash_code_cache ON stock_cash_data(stock_code, cache_year, cache_month);"
         ]
     },
     
@@ -319,6 +331,68 @@ TABLE_SCHEMAS = {
         ]
     },
     
+    'economy_sp500_data': {
+        'description': 'S&P 500 지수 데이터',
+        'sql': """
+            CREATE TABLE IF NOT EXISTS economy_sp500_data (
+                id SERIAL PRIMARY KEY,
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                sp500_value DECIMAL(15,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(year, quarter)
+            );
+        """,
+        'indexes': [
+            "CREATE INDEX IF NOT EXISTS idx_economy_sp500_year ON economy_sp500_data(year);",
+            "CREATE INDEX IF NOT EXISTS idx_economy_sp500_cache ON economy_sp500_data(cache_year, cache_month);"
+        ]
+    },
+    
+    'economy_buffett_indicator_data': {
+        'description': '버핏지수 (시가총액 / GDP) 데이터',
+        'sql': """
+            CREATE TABLE IF NOT EXISTS economy_buffett_indicator_data (
+                id SERIAL PRIMARY KEY,
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                market_cap DECIMAL(20,4),
+                gdp_value DECIMAL(20,4),
+                buffett_ratio DECIMAL(10,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(year, quarter)
+            );
+        """,
+        'indexes': [
+            "CREATE INDEX IF NOT EXISTS idx_economy_buffett_indicator_year ON economy_buffett_indicator_data(year);",
+            "CREATE INDEX IF NOT EXISTS idx_economy_buffett_indicator_cache ON economy_buffett_indicator_data(cache_year, cache_month);"
+        ]
+    },
+    
+    'economy_housing_inventory_data': {
+        'description': '주택재고량 데이터',
+        'sql': """
+            CREATE TABLE IF NOT EXISTS economy_housing_inventory_data (
+                id SERIAL PRIMARY KEY,
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                inventory_value DECIMAL(15,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(year, quarter)
+            );
+        """,
+        'indexes': [
+            "CREATE INDEX IF NOT EXISTS idx_economy_housing_inventory_year ON economy_housing_inventory_data(year);",
+            "CREATE INDEX IF NOT EXISTS idx_economy_housing_inventory_cache ON economy_housing_inventory_data(cache_year, cache_month);"
+        ]
+    },
+    
     'economy_mortgage_delinquency_data': {
         'description': '모기지 연체율 데이터',
         'sql': """
@@ -338,11 +412,211 @@ TABLE_SCHEMAS = {
             "CREATE INDEX IF NOT EXISTS idx_economy_mortgage_delinquency_cache ON economy_mortgage_delinquency_data(cache_year, cache_month);"
         ]
     },
+    
+    'stock_valuation_data': {
+        'description': 'PBR, PER, EV/EBITDA 밸류에이션 지표 데이터',
+        'sql': """
+            CREATE TABLE IF NOT EXISTS stock_valuation_data (
+                id SERIAL PRIMARY KEY,
+                stock_code VARCHAR(20) NOT NULL,
+                company_name VARCHAR(200),
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                pbr DECIMAL(10,4),
+                per DECIMAL(10,4),
+                ev_ebitda DECIMAL(10,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(stock_code, year, quarter)
+            );
+        """,
+        'indexes': [
+            "CREATE INDEX IF NOT EXISTS idx_stock_valuation_code_year ON stock_valuation_data(stock_code, year);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_valuation_cache ON stock_valuation_data(cache_year, cache_month);",
+            "CREATE INDEX IF NOT EXISTS idx_stock_valuation_code_cache ON stock_valuation_data(stock_code, cache_year, cache_month);"
+        ]
+    },
 }
 
+# 종목별 캐시 테이블 (stock_ 접두사)
+STOCK_CACHE_TABLES = tuple(name for name in TABLE_SCHEMAS if name.startswith('stock_'))
+
+# 종목 캐시 테이블별 지표 값 열 (save_all_metrics() INSERT 열 목록, app의 레코드/차트 열)
+STOCK_VALUE_COLUMNS = {
+    'stock_price_data': ('stock_price',),
+    'stock_revenue_data': ('revenue',),
+    'stock_operating_income_data': ('operating_income',),
+    'stock_net_profit_data': ('net_profit',),
+    'stock_total_debt_data': ('total_debt',),
+    'stock_current_liabilities_data': ('current_liabilities',),
+    'stock_interest_expense_data': ('interest_expense',),
+    'stock_cash_data': ('cash_and_equivalents',),
+    'stock_valuation_data': ('pbr', 'per', 'ev_ebitda'),
+}
+
+# 경제 지표 테이블 (economy_ 접두사, 앱이 ON CONFLICT (year, quarter)로 저장)
+ECONOMY_TABLES = [name for name in TABLE_SCHEMAS if name.startswith('economy_')]
+
+# 기존 데이터베이스 마이그레이션: UNIQUE(year, quarter) 없이 수동으로 만든 경제 지표 테이블에 제약 추가
+# (제약이 없으면 ON CONFLICT (year, quarter) INSERT가 거부됨, 중복 분기는 먼저 하나만 남기고 삭제)
+MIGRATIONS_SQL = "\n".join(
+    f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{name}') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.{name}'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM {name} a USING {name} b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE {name} ADD CONSTRAINT {name}_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;"""
+    for name in ECONOMY_TABLES
+)
+
+# 보조 함수 정의
+# - list_public_tables(): 테이블 존재 여부를 RPC 한 번으로 조회
+# - get_stock_freshness(): 종목의 모든 캐시 테이블에 해당 달 데이터가 있는지 RPC 한 번으로 조회
+# - get_stock_metrics(): 종목의 모든 캐시 테이블 차트용 데이터를 RPC 한 번으로 조회 (테이블명 -> 행 배열)
+# - clear_all_caches(): 종목의 모든 캐시 테이블에서 해당 달 데이터를 한 트랜잭션으로 삭제 (삭제 개수 반환)
+# - save_all_metrics(): {테이블명: 레코드 배열} JSON을 받아 모든 캐시 테이블에 한 트랜잭션으로 저장
+#   (중복 분기는 ON CONFLICT DO NOTHING으로 건너뛰고 {테이블명: 저장 개수} 반환)
+# - stock_all_metrics: 어느 테이블에든 있는 (stock_code, year, quarter)마다 모든 지표를 한 행으로 합친 구체화 뷰
+#   (조회 때마다 9개 테이블을 조인하지 않도록 결과를 저장해 두고, 고유 인덱스로 종목별 조회)
+# - refresh_stock_all_metrics(): 구체화 뷰를 CONCURRENTLY로 갱신 (예약 작업이 저장/삭제를 모아 한 번 호출)
+#   SECURITY DEFINER 함수라 anon/authenticated 실행 권한은 회수하고 service_role만 실행 가능
+HELPER_FUNCTIONS_SQL = """
+            CREATE OR REPLACE FUNCTION list_public_tables()
+            RETURNS SETOF text AS $$
+                SELECT tablename::text FROM pg_tables WHERE schemaname = 'public'
+            $$ LANGUAGE sql STABLE;
+        """ + """
+            CREATE OR REPLACE FUNCTION get_stock_freshness(p_stock_code text, p_year integer, p_month integer)
+            RETURNS TABLE(table_name text, fresh boolean) AS $$
+%s
+            $$ LANGUAGE sql STABLE;
+        """ % "\n                UNION ALL\n".join(
+    f"                SELECT '{name}'::text, EXISTS (SELECT 1 FROM {name} "
+    f"WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)"
+    for name in STOCK_CACHE_TABLES
+) + """
+            CREATE OR REPLACE FUNCTION get_stock_metrics(p_stock_code text, p_start_year integer)
+            RETURNS jsonb AS $$
+                SELECT jsonb_build_object(
+%s
+                )
+            $$ LANGUAGE sql STABLE;
+        """ % ",\n".join(
+    f"                    '{name}', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM {name} t "
+    f"WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb)"
+    for name in STOCK_CACHE_TABLES
+) + """
+            CREATE OR REPLACE FUNCTION clear_all_caches(p_stock_code text, p_year integer, p_month integer)
+            RETURNS integer AS $$
+            DECLARE
+                deleted integer := 0;
+                n integer;
+            BEGIN
+%s
+                RETURN deleted;
+            END
+            $$ LANGUAGE plpgsql;
+        """ % "\n".join(
+    f"                DELETE FROM {name} WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;\n"
+    f"                GET DIAGNOSTICS n = ROW_COUNT;\n"
+    f"                deleted := deleted + n;"
+    for name in STOCK_CACHE_TABLES
+) + """
+            -- 예전 버전에서 만든 일반 뷰와 주가 행 기준(metric_keys 없음) 구체화 뷰는 다시 만들기 위해 먼저 삭제
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_views WHERE schemaname = 'public' AND viewname = 'stock_all_metrics') THEN
+                    DROP VIEW stock_all_metrics;
+                END IF;
+                IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'public' AND matviewname = 'stock_all_metrics'
+                           AND position('metric_keys' IN definition) = 0) THEN
+                    DROP MATERIALIZED VIEW stock_all_metrics;
+                END IF;
+            END
+            $$;
+            CREATE MATERIALIZED VIEW IF NOT EXISTS stock_all_metrics AS
+                -- 어느 한 테이블에라도 있는 (종목, 년도, 분기)를 모두 포함 (주가가 없는 분기도 재무 지표는 표시)
+                WITH metric_keys AS (
+                    SELECT stock_code, year, quarter FROM stock_price_data
+                    UNION SELECT stock_code, year, quarter FROM stock_revenue_data
+                    UNION SELECT stock_code, year, quarter FROM stock_operating_income_data
+                    UNION SELECT stock_code, year, quarter FROM stock_net_profit_data
+                    UNION SELECT stock_code, year, quarter FROM stock_total_debt_data
+                    UNION SELECT stock_code, year, quarter FROM stock_current_liabilities_data
+                    UNION SELECT stock_code, year, quarter FROM stock_interest_expense_data
+                    UNION SELECT stock_code, year, quarter FROM stock_cash_data
+                    UNION SELECT stock_code, year, quarter FROM stock_valuation_data
+                )
+                SELECT stock_code, year, quarter,
+                       COALESCE(p.company_name, r.company_name, o.company_name, n.company_name, d.company_name,
+                                cl.company_name, i.company_name, c.company_name, v.company_name) AS company_name,
+                       p.stock_price, r.revenue, o.operating_income, n.net_profit, d.total_debt,
+                       cl.current_liabilities, i.interest_expense, c.cash_and_equivalents,
+                       v.pbr, v.per, v.ev_ebitda
+                FROM metric_keys
+                LEFT JOIN stock_price_data p USING (stock_code, year, quarter)
+                LEFT JOIN stock_revenue_data r USING (stock_code, year, quarter)
+                LEFT JOIN stock_operating_income_data o USING (stock_code, year, quarter)
+                LEFT JOIN stock_net_profit_data n USING (stock_code, year, quarter)
+                LEFT JOIN stock_total_debt_data d USING (stock_code, year, quarter)
+                LEFT JOIN stock_current_liabilities_data cl USING (stock_code, year, quarter)
+                LEFT JOIN stock_interest_expense_data i USING (stock_code, year, quarter)
+                LEFT JOIN stock_cash_data c USING (stock_code, year, quarter)
+                LEFT JOIN stock_valuation_data v USING (stock_code, year, quarter);
+            -- REFRESH ... CONCURRENTLY에 필요한 고유 인덱스 (조회 조건인 stock_code로 시작)
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_stock_all_metrics_key ON stock_all_metrics (stock_code, year, quarter);
+            
+            CREATE OR REPLACE FUNCTION refresh_stock_all_metrics()
+            RETURNS void AS $$
+            BEGIN
+                REFRESH MATERIALIZED VIEW CONCURRENTLY stock_all_metrics;
+            END
+            $$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+            -- 공개 anon 키로 전체 뷰 갱신을 반복 호출하지 못하도록 service_role만 실행 허용
+            REVOKE EXECUTE ON FUNCTION refresh_stock_all_metrics() FROM PUBLIC, anon, authenticated;
+            GRANT EXECUTE ON FUNCTION refresh_stock_all_metrics() TO service_role;
+        """ + """
+            CREATE OR REPLACE FUNCTION save_all_metrics(p_payload jsonb)
+            RETURNS jsonb AS $$
+            DECLARE
+                saved jsonb := '{}'::jsonb;
+                n integer;
+            BEGIN
+%s
+                RETURN saved;
+            END
+            $$ LANGUAGE plpgsql;
+        """ % "\n".join(
+    f"                IF p_payload ? '{name}' THEN\n"
+    f"                    INSERT INTO {name} ({columns})\n"
+    f"                    SELECT {columns} FROM jsonb_populate_recordset(NULL::{name}, p_payload->'{name}')\n"
+    f"                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;\n"
+    f"                    GET DIAGNOSTICS n = ROW_COUNT;\n"
+    f"                    saved := saved || jsonb_build_object('{name}', n);\n"
+    f"                END IF;"
+    for name, columns in (
+        (name, ', '.join(('stock_code', 'company_name', 'year', 'quarter', *STOCK_VALUE_COLUMNS[name],
+                          'cache_year', 'cache_month', 'last_updated')))
+        for name in STOCK_CACHE_TABLES
+    )
+)
+
 
 def get_db_connection():
     """PostgreSQL 데이터베이스 연결 생성"""
+    if psycopg2 is None:
+        print("[ERROR] psycopg2가 설치되지 않아 데이터베이스에 직접 연결할 수 없습니다.")
+        return None
     try:
         conn = psycopg2.connect(SUPABASE_DB_URL)
         return conn
@@ -403,6 +677,28 @@ def create_all_tables(db_url=None):
         if create_table(conn, table_name, schema_info):
             success_count += 1
     
+    # 이전에 수동으로 만든 테이블에 빠진 제약 추가 (실패해도 테이블 생성 결과에는 영향 없음)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(MIGRATIONS_SQL)
+        conn.commit()
+        cursor.close()
+        print("  [SUCCESS] 완료: 마이그레이션")
+    except Exception as e:
+        print(f"  [ERROR] 오류 (마이그레이션): {e}")
+        conn.rollback()
+    
+    # 보조 함수 생성 (실패해도 테이블 생성 결과에는 영향 없음)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(HELPER_FUNCTIONS_SQL)
+        conn.commit()
+        cursor.close()
+        print("  [SUCCESS] 완료: list_public_tables(), get_stock_freshness(), get_stock_metrics(), clear_all_caches(), stock_all_metrics, refresh_stock_all_metrics(), save_all_metrics()")
+    except Exception as e:
+        print(f"  [ERROR] 오류 (보조 함수): {e}")
+        conn.rollback()
+    
     conn.close()
     
     print("\n" + "=" * 80)
@@ -458,9 +754,28 @@ def check_table_exists_via_supabase(supabase_client, table_name):
             return False
 
 
+def list_existing_tables_via_supabase(supabase_client):
+    """public 스키마의 테이블 이름 집합을 RPC 한 번으로 조회 (함수가 없거나 실패하면 None)"""
+    try:
+        result = supabase_client.rpc('list_public_tables').execute()
+    except Exception as e:
+        print(f"[WARNING] list_public_tables() 조회 실패, 테이블별 확인으로 대체합니다: {e}")
+        return None
+    
+    # RETURNS SETOF text 결과는 문자열 목록 또는 {'list_public_tables': 이름} 목록으로 올 수 있음
+    tables = set()
+    for row in result.data or []:
+        tables.add(row if isinstance(row, str) else row.get('list_public_tables'))
+    return tables
+
+
+# 이 프로세스에서 이미 존재를 확인했거나 생성한 테이블 (저장할 때마다 다시 확인하지 않음)
+_READY_TABLES = set()
+
+
 def ensure_table_exists(table_name, supabase_client=None, db_url=None):
     """
-    테이블이 없으면 자동으로 생성
+    테이블이 없으면 자동으로 생성 (프로세스당 테이블별로 한 번만 확인)
     
     Args:
         table_name: 확인할 테이블 이름
@@ -470,6 +785,9 @@ def ensure_table_exists(table_name, supabase_client=None, db_url=None):
     Returns:
         bool: 테이블이 존재하거나 성공적으로 생성되면 True
     """
+    if table_name in _READY_TABLES:
+        return True
+    
     # 1. 테이블 존재 여부 확인
     if supabase_client:
         exists = check_table_exists_via_supabase(supabase_client, table_name)
@@ -477,6 +795,7 @@ def ensure_table_exists(table_name, supabase_client=None, db_url=None):
         exists = check_table_exists(table_name)
     
     if exists:
+        _READY_TABLES.add(table_name)
         return True
     
     # 2. 테이블이 없으면 생성
@@ -518,6 +837,7 @@ def ensure_table_exists(table_name, supabase_client=None, db_url=None):
         
         if success:
             print(f"[SUCCESS] 테이블 생성 완료: {table_name}")
+            _READY_TABLES.add(table_name)
             return True
         else:
             print(f"[ERROR] 테이블 생성 실패: {table_name}")
@@ -528,6 +848,59 @@ def ensure_table_exists(table_name, supabase_client=None, db_url=None):
         return False
 
 
+def create_all_indexes(db_url=None):
+    """이미 있는 테이블에도 TABLE_SCHEMAS의 인덱스를 적용 (IF NOT EXISTS라 여러 번 실행해도 안전)
+    테이블 생성 이후 추가된 복합 인덱스를 기존 데이터베이스에 반영할 때 사용합니다."""
+    if db_url:
+        global SUPABASE_DB_URL
+        SUPABASE_DB_URL = db_url
+    
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        for table_name, schema_info in TABLE_SCHEMAS.items():
+            for index_sql in schema_info.get('indexes', []):
+                cursor.execute(index_sql)
+        conn.commit()
+        cursor.close()
+        print("[SUCCESS] 인덱스 적용 완료")
+        return True
+    except Exception as e:
+        print(f"[ERROR] 인덱스 적용 오류: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def apply_migrations(db_url=None):
+    """기존 테이블에 MIGRATIONS_SQL 적용 (조건부 DO 블록이라 여러 번 실행해도 안전)"""
+    if db_url:
+        global SUPABASE_DB_URL
+        SUPABASE_DB_URL = db_url
+    
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute(MIGRATIONS_SQL)
+        conn.commit()
+        cursor.close()
+        print("[SUCCESS] 마이그레이션 적용 완료")
+        return True
+    except Exception as e:
+        print(f"[ERROR] 마이그레이션 적용 오류: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
 def check_all_tables():
     """모든 필수 테이블 존재 여부 확인"""
     print("\n" + "=" * 80)
@@ -594,6 +967,14 @@ def export_to_sql_file(filename='setup_tables.sql'):
                 for index_sql in schema_info['indexes']:
                     f.write(index_sql + "\n")
                 f.write("\n")
+        
+        f.write("-- 기존 테이블 마이그레이션 (경제 지표 테이블 UNIQUE(year, quarter))\n")
+        f.write(MIGRATIONS_SQL)
+        f.write("\n\n")
+        
+        f.write("-- RPC 보조 함수\n")
+        f.write(HELPER_FUNCTIONS_SQL)
+        f.write("\n\n")
     
     print(f"[SUCCESS] SQL 파일 생성 완료: {filename}\n")
 
@@ -636,6 +1017,12 @@ if __name__ == '__main__':
                 create_all_tables(db_url)
         else:
             print_manual_instructions()
+    else:
+        # 기존 테이블에 새로 추가된 인덱스 반영
+        db_url = os.getenv('SUPABASE_DB_URL')
+        if db_url and 'your_password' not in db_url:
+            create_all_indexes(db_url)
+            apply_migrations(db_url)
     
     print("\n[SUCCESS] 완료\n")
 
@@ -19,6 +19,7 @@
 
 CREATE INDEX IF NOT EXISTS idx_stock_price_code_year ON stock_price_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_price_cache ON stock_price_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_price_code_cache ON stock_price_data(stock_code, cache_year, cache_month);
 
 -- 매출 데이터
 
@@ -38,6 +39,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_price_cache ON stock_price_data(cache_year,
 
 CREATE INDEX IF NOT EXISTS idx_stock_revenue_code_year ON stock_revenue_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_revenue_cache ON stock_revenue_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_revenue_code_cache ON stock_revenue_data(stock_code, cache_year, cache_month);
 
 -- 영업이익 데이터
 
@@ -57,6 +59,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_revenue_cache ON stock_revenue_data(cache_y
 
 CREATE INDEX IF NOT EXISTS idx_stock_operating_income_code_year ON stock_operating_income_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_operating_income_cache ON stock_operating_income_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_operating_income_code_cache ON stock_operating_income_data(stock_code, cache_year, cache_month);
 
 -- 당기순이익 데이터
 
@@ -76,6 +79,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_operating_income_cache ON stock_operating_i
 
 CREATE INDEX IF NOT EXISTS idx_stock_net_profit_code_year ON stock_net_profit_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_net_profit_cache ON stock_net_profit_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_net_profit_code_cache ON stock_net_profit_data(stock_code, cache_year, cache_month);
 
 -- 총부채 데이터
 
@@ -95,6 +99,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_net_profit_cache ON stock_net_profit_data(c
 
 CREATE INDEX IF NOT EXISTS idx_stock_total_debt_code_year ON stock_total_debt_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_total_debt_cache ON stock_total_debt_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_total_debt_code_cache ON stock_total_debt_data(stock_code, cache_year, cache_month);
 
 -- 유동부채 데이터
 
@@ -114,6 +119,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_total_debt_cache ON stock_total_debt_data(c
 
 CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_code_year ON stock_current_liabilities_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_cache ON stock_current_liabilities_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_code_cache ON stock_current_liabilities_data(stock_code, cache_year, cache_month);
 
 -- 이자비용 데이터
 
@@ -133,6 +139,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_current_liabilities_cache ON stock_current_
 
 CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_code_year ON stock_interest_expense_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_cache ON stock_interest_expense_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_code_cache ON stock_interest_expense_data(stock_code, cache_year, cache_month);
 
 -- 현금및현금성자산 데이터
 
@@ -152,6 +159,7 @@ CREATE INDEX IF NOT EXISTS idx_stock_interest_expense_cache ON stock_interest_ex
 
 CREATE INDEX IF NOT EXISTS idx_stock_cash_code_year ON stock_cash_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_cash_cache ON stock_cash_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_cash_code_cache ON stock_cash_data(stock_code, cache_year, cache_month);
 
 -- 미국 국채금리 데이터 (5년물 vs 3개월물)
 
@@ -256,6 +264,59 @@ CREATE INDEX IF NOT EXISTS idx_economy_gdp_cache ON economy_gdp_data(cache_year,
 CREATE INDEX IF NOT EXISTS idx_economy_buffett_year ON economy_buffett_data(year);
 CREATE INDEX IF NOT EXISTS idx_economy_buffett_cache ON economy_buffett_data(cache_year, cache_month);
 
+-- S&P 500 지수 데이터
+
+            CREATE TABLE IF NOT EXISTS economy_sp500_data (
+                id SERIAL PRIMARY KEY,
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                sp500_value DECIMAL(15,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(year, quarter)
+            );
+        
+
+CREATE INDEX IF NOT EXISTS idx_economy_sp500_year ON economy_sp500_data(year);
+CREATE INDEX IF NOT EXISTS idx_economy_sp500_cache ON economy_sp500_data(cache_year, cache_month);
+
+-- 버핏지수 (시가총액 / GDP) 데이터
+
+            CREATE TABLE IF NOT EXISTS economy_buffett_indicator_data (
+                id SERIAL PRIMARY KEY,
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                market_cap DECIMAL(20,4),
+                gdp_value DECIMAL(20,4),
+                buffett_ratio DECIMAL(10,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(year, quarter)
+            );
+        
+
+CREATE INDEX IF NOT EXISTS idx_economy_buffett_indicator_year ON economy_buffett_indicator_data(year);
+CREATE INDEX IF NOT EXISTS idx_economy_buffett_indicator_cache ON economy_buffett_indicator_data(cache_year, cache_month);
+
+-- 주택재고량 데이터
+
+            CREATE TABLE IF NOT EXISTS economy_housing_inventory_data (
+                id SERIAL PRIMARY KEY,
+                year INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                inventory_value DECIMAL(15,4),
+                cache_year INTEGER,
+                cache_month INTEGER,
+                last_updated TIMESTAMP DEFAULT NOW(),
+                UNIQUE(year, quarter)
+            );
+        
+
+CREATE INDEX IF NOT EXISTS idx_economy_housing_inventory_year ON economy_housing_inventory_data(year);
+CREATE INDEX IF NOT EXISTS idx_economy_housing_inventory_cache ON economy_housing_inventory_data(cache_year, cache_month);
+
 -- 모기지 연체율 데이터
 
             CREATE TABLE IF NOT EXISTS economy_mortgage_delinquency_data (
@@ -293,4 +354,382 @@ CREATE INDEX IF NOT EXISTS idx_economy_mortgage_delinquency_cache ON economy_mor
 
 CREATE INDEX IF NOT EXISTS idx_stock_valuation_code_year ON stock_valuation_data(stock_code, year);
 CREATE INDEX IF NOT EXISTS idx_stock_valuation_cache ON stock_valuation_data(cache_year, cache_month);
+CREATE INDEX IF NOT EXISTS idx_stock_valuation_code_cache ON stock_valuation_data(stock_code, cache_year, cache_month);
+
+-- 기존 테이블 마이그레이션 (경제 지표 테이블 UNIQUE(year, quarter))
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_treasury_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_treasury_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_treasury_data a USING economy_treasury_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_treasury_data ADD CONSTRAINT economy_treasury_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_cpi_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_cpi_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_cpi_data a USING economy_cpi_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_cpi_data ADD CONSTRAINT economy_cpi_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_industrial_production_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_industrial_production_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_industrial_production_data a USING economy_industrial_production_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_industrial_production_data ADD CONSTRAINT economy_industrial_production_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_unemployment_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_unemployment_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_unemployment_data a USING economy_unemployment_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_unemployment_data ADD CONSTRAINT economy_unemployment_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_gdp_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_gdp_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_gdp_data a USING economy_gdp_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_gdp_data ADD CONSTRAINT economy_gdp_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_buffett_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_buffett_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_buffett_data a USING economy_buffett_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_buffett_data ADD CONSTRAINT economy_buffett_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_sp500_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_sp500_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_sp500_data a USING economy_sp500_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_sp500_data ADD CONSTRAINT economy_sp500_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_buffett_indicator_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_buffett_indicator_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_buffett_indicator_data a USING economy_buffett_indicator_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_buffett_indicator_data ADD CONSTRAINT economy_buffett_indicator_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_housing_inventory_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_housing_inventory_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_housing_inventory_data a USING economy_housing_inventory_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_housing_inventory_data ADD CONSTRAINT economy_housing_inventory_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+            DO $$
+            BEGIN
+                IF to_regclass('public.economy_mortgage_delinquency_data') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = 'public.economy_mortgage_delinquency_data'::regclass AND i.indisunique
+                      AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a
+                           WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) = ARRAY['quarter', 'year']
+                ) THEN
+                    DELETE FROM economy_mortgage_delinquency_data a USING economy_mortgage_delinquency_data b
+                    WHERE a.year = b.year AND a.quarter = b.quarter AND a.ctid > b.ctid;
+                    ALTER TABLE economy_mortgage_delinquency_data ADD CONSTRAINT economy_mortgage_delinquency_data_year_quarter_key UNIQUE (year, quarter);
+                END IF;
+            END
+            $$;
+
+
+-- 테이블 존재 여부 확인용 보조 함수
+
+            CREATE OR REPLACE FUNCTION list_public_tables()
+            RETURNS SETOF text AS $$
+                SELECT tablename::text FROM pg_tables WHERE schemaname = 'public'
+            $$ LANGUAGE sql STABLE;
+        
+
+
+-- 종목 캐시 신선도 일괄 확인용 보조 함수
+
+            CREATE OR REPLACE FUNCTION get_stock_freshness(p_stock_code text, p_year integer, p_month integer)
+            RETURNS TABLE(table_name text, fresh boolean) AS $$
+                SELECT 'stock_price_data'::text, EXISTS (SELECT 1 FROM stock_price_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_revenue_data'::text, EXISTS (SELECT 1 FROM stock_revenue_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_operating_income_data'::text, EXISTS (SELECT 1 FROM stock_operating_income_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_net_profit_data'::text, EXISTS (SELECT 1 FROM stock_net_profit_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_total_debt_data'::text, EXISTS (SELECT 1 FROM stock_total_debt_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_current_liabilities_data'::text, EXISTS (SELECT 1 FROM stock_current_liabilities_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_interest_expense_data'::text, EXISTS (SELECT 1 FROM stock_interest_expense_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_cash_data'::text, EXISTS (SELECT 1 FROM stock_cash_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+                UNION ALL
+                SELECT 'stock_valuation_data'::text, EXISTS (SELECT 1 FROM stock_valuation_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month)
+            $$ LANGUAGE sql STABLE;
+        
+
+-- 종목 차트 데이터 일괄 조회용 보조 함수
+
+            CREATE OR REPLACE FUNCTION get_stock_metrics(p_stock_code text, p_start_year integer)
+            RETURNS jsonb AS $$
+                SELECT jsonb_build_object(
+                    'stock_price_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_price_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_revenue_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_revenue_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_operating_income_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_operating_income_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_net_profit_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_net_profit_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_total_debt_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_total_debt_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_current_liabilities_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_current_liabilities_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_interest_expense_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_interest_expense_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_cash_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_cash_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb),
+                    'stock_valuation_data', COALESCE((SELECT jsonb_agg(t ORDER BY t.year, t.quarter) FROM stock_valuation_data t WHERE t.stock_code = p_stock_code AND t.year >= p_start_year), '[]'::jsonb)
+                )
+            $$ LANGUAGE sql STABLE;
+        
+
+
+-- 종목 캐시 일괄 삭제용 보조 함수
+
+            CREATE OR REPLACE FUNCTION clear_all_caches(p_stock_code text, p_year integer, p_month integer)
+            RETURNS integer AS $$
+            DECLARE
+                deleted integer := 0;
+                n integer;
+            BEGIN
+                DELETE FROM stock_price_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_revenue_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_operating_income_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_net_profit_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_total_debt_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_current_liabilities_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_interest_expense_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_cash_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                DELETE FROM stock_valuation_data WHERE stock_code = p_stock_code AND cache_year = p_year AND cache_month = p_month;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                deleted := deleted + n;
+                RETURN deleted;
+            END
+            $$ LANGUAGE plpgsql;
+        
+
+-- 종목 전체 지표 조회용 구체화 뷰 (예약 작업이 refresh_stock_all_metrics()로 갱신, service_role만 실행 가능)
+
+            -- 예전 버전에서 만든 일반 뷰와 주가 행 기준(metric_keys 없음) 구체화 뷰는 다시 만들기 위해 먼저 삭제
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_views WHERE schemaname = 'public' AND viewname = 'stock_all_metrics') THEN
+                    DROP VIEW stock_all_metrics;
+                END IF;
+                IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'public' AND matviewname = 'stock_all_metrics'
+                           AND position('metric_keys' IN definition) = 0) THEN
+                    DROP MATERIALIZED VIEW stock_all_metrics;
+                END IF;
+            END
+            $$;
+            CREATE MATERIALIZED VIEW IF NOT EXISTS stock_all_metrics AS
+                -- 어느 한 테이블에라도 있는 (종목, 년도, 분기)를 모두 포함 (주가가 없는 분기도 재무 지표는 표시)
+                WITH metric_keys AS (
+                    SELECT stock_code, year, quarter FROM stock_price_data
+                    UNION SELECT stock_code, year, quarter FROM stock_revenue_data
+                    UNION SELECT stock_code, year, quarter FROM stock_operating_income_data
+                    UNION SELECT stock_code, year, quarter FROM stock_net_profit_data
+                    UNION SELECT stock_code, year, quarter FROM stock_total_debt_data
+                    UNION SELECT stock_code, year, quarter FROM stock_current_liabilities_data
+                    UNION SELECT stock_code, year, quarter FROM stock_interest_expense_data
+                    UNION SELECT stock_code, year, quarter FROM stock_cash_data
+                    UNION SELECT stock_code, year, quarter FROM stock_valuation_data
+                )
+                SELECT stock_code, year, quarter,
+                       COALESCE(p.company_name, r.company_name, o.company_name, n.company_name, d.company_name,
+                                cl.company_name, i.company_name, c.company_name, v.company_name) AS company_name,
+                       p.stock_price, r.revenue, o.operating_income, n.net_profit, d.total_debt,
+                       cl.current_liabilities, i.interest_expense, c.cash_and_equivalents,
+                       v.pbr, v.per, v.ev_ebitda
+                FROM metric_keys
+                LEFT JOIN stock_price_data p USING (stock_code, year, quarter)
+                LEFT JOIN stock_revenue_data r USING (stock_code, year, quarter)
+                LEFT JOIN stock_operating_income_data o USING (stock_code, year, quarter)
+                LEFT JOIN stock_net_profit_data n USING (stock_code, year, quarter)
+                LEFT JOIN stock_total_debt_data d USING (stock_code, year, quarter)
+                LEFT JOIN stock_current_liabilities_data cl USING (stock_code, year, quarter)
+                LEFT JOIN stock_interest_expense_data i USING (stock_code, year, quarter)
+                LEFT JOIN stock_cash_data c USING (stock_code, year, quarter)
+                LEFT JOIN stock_valuation_data v USING (stock_code, year, quarter);
+            -- REFRESH ... CONCURRENTLY에 필요한 고유 인덱스 (조회 조건인 stock_code로 시작)
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_stock_all_metrics_key ON stock_all_metrics (stock_code, year, quarter);
+            
+            CREATE OR REPLACE FUNCTION refresh_stock_all_metrics()
+            RETURNS void AS $$
+            BEGIN
+                REFRESH MATERIALIZED VIEW CONCURRENTLY stock_all_metrics;
+            END
+            $$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+            -- 공개 anon 키로 전체 뷰 갱신을 반복 호출하지 못하도록 service_role만 실행 허용
+            REVOKE EXECUTE ON FUNCTION refresh_stock_all_metrics() FROM PUBLIC, anon, authenticated;
+            GRANT EXECUTE ON FUNCTION refresh_stock_all_metrics() TO service_role;
+        
 
+-- 종목 지표 일괄 저장용 보조 함수
+
+            CREATE OR REPLACE FUNCTION save_all_metrics(p_payload jsonb)
+            RETURNS jsonb AS $$
+            DECLARE
+                saved jsonb := '{}'::jsonb;
+                n integer;
+            BEGIN
+                IF p_payload ? 'stock_price_data' THEN
+                    INSERT INTO stock_price_data (stock_code, company_name, year, quarter, stock_price, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, stock_price, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_price_data, p_payload->'stock_price_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_price_data', n);
+                END IF;
+                IF p_payload ? 'stock_revenue_data' THEN
+                    INSERT INTO stock_revenue_data (stock_code, company_name, year, quarter, revenue, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, revenue, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_revenue_data, p_payload->'stock_revenue_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_revenue_data', n);
+                END IF;
+                IF p_payload ? 'stock_operating_income_data' THEN
+                    INSERT INTO stock_operating_income_data (stock_code, company_name, year, quarter, operating_income, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, operating_income, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_operating_income_data, p_payload->'stock_operating_income_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_operating_income_data', n);
+                END IF;
+                IF p_payload ? 'stock_net_profit_data' THEN
+                    INSERT INTO stock_net_profit_data (stock_code, company_name, year, quarter, net_profit, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, net_profit, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_net_profit_data, p_payload->'stock_net_profit_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_net_profit_data', n);
+                END IF;
+                IF p_payload ? 'stock_total_debt_data' THEN
+                    INSERT INTO stock_total_debt_data (stock_code, company_name, year, quarter, total_debt, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, total_debt, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_total_debt_data, p_payload->'stock_total_debt_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_total_debt_data', n);
+                END IF;
+                IF p_payload ? 'stock_current_liabilities_data' THEN
+                    INSERT INTO stock_current_liabilities_data (stock_code, company_name, year, quarter, current_liabilities, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, current_liabilities, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_current_liabilities_data, p_payload->'stock_current_liabilities_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_current_liabilities_data', n);
+                END IF;
+                IF p_payload ? 'stock_interest_expense_data' THEN
+                    INSERT INTO stock_interest_expense_data (stock_code, company_name, year, quarter, interest_expense, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, interest_expense, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_interest_expense_data, p_payload->'stock_interest_expense_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_interest_expense_data', n);
+                END IF;
+                IF p_payload ? 'stock_cash_data' THEN
+                    INSERT INTO stock_cash_data (stock_code, company_name, year, quarter, cash_and_equivalents, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, cash_and_equivalents, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_cash_data, p_payload->'stock_cash_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_cash_data', n);
+                END IF;
+                IF p_payload ? 'stock_valuation_data' THEN
+                    INSERT INTO stock_valuation_data (stock_code, company_name, year, quarter, pbr, per, ev_ebitda, cache_year, cache_month, last_updated)
+                    SELECT stock_code, company_name, year, quarter, pbr, per, ev_ebitda, cache_year, cache_month, last_updated FROM jsonb_populate_recordset(NULL::stock_valuation_data, p_payload->'stock_valuation_data')
+                    ON CONFLICT (stock_code, year, quarter) DO NOTHING;
+                    GET DIAGNOSTICS n = ROW_COUNT;
+                    saved := saved || jsonb_build_object('stock_valuation_data', n);
+                END IF;
+                RETURN saved;
+            END
+            $$ LANGUAGE plpgsql;
+        
\ No newline at end of file
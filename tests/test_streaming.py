@@ -0,0 +1,39 @@
+import os
+
+# 임포트 전에 설정 (테스트가 작업 디렉터리의 data.db를 건드리지 않도록)
+os.environ.setdefault('DATA_DB', ':memory:')
+
+import orjson
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture(scope='module')
+def client():
+    client = app_module.app.test_client()
+    for i in range(app_module.STREAM_THRESHOLD):
+        response = client.post('/api/stocks', json={'name': f'종목{i}', 'symbol': f'S{i}', 'quantity': 1, 'price': 1.0})
+        assert response.status_code == 201
+    return client
+
+
+def test_large_list_is_streamed_without_compression(client):
+    response = client.get('/api/stocks', headers={'Accept-Encoding': 'br, gzip'})
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert 'Content-Length' not in response.headers
+    assert len(orjson.loads(response.get_data())) >= app_module.STREAM_THRESHOLD
+
+
+def test_buffered_response_is_still_compressed(client):
+    # 스트리밍 기준보다 작은 목록은 한 번에 직렬화되므로 그대로 압축됨
+    threshold = app_module.STREAM_THRESHOLD
+    app_module.STREAM_THRESHOLD = len(app_module.load_data().stocks) + 1
+    try:
+        response = client.get('/api/stocks', headers={'Accept-Encoding': 'gzip'})
+    finally:
+        app_module.STREAM_THRESHOLD = threshold
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == 'gzip'